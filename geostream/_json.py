@@ -0,0 +1,42 @@
+import typing as typ
+
+import simplejson as json
+
+try:
+    import orjson
+
+    HAS_ORJSON = True
+except ImportError:  # pragma: no cover
+    HAS_ORJSON = False
+
+if HAS_ORJSON:
+    # leave datetimes and dataclasses to the default function, or to raise TypeError like simplejson
+    _ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+
+
+def loads(data: typ.Union[bytes, bytearray]) -> typ.Any:
+    """Parse JSON with orjson when it is installed, it reads the UTF-8 bytes without decoding them to a str first"""
+    if HAS_ORJSON:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass  # NaN, Infinity or integers beyond 64 bits, which simplejson writes and reads
+    return json.loads(data)
+
+
+def dumps(
+    obj: typ.Any, default: typ.Optional[typ.Callable[[typ.Any], typ.Any]] = None, non_str_keys: bool = False
+) -> typ.Optional[bytes]:
+    """
+    Serialize to compact JSON with orjson when it is installed, or return None for simplejson to serialize instead.
+    orjson writes NaN and Infinity as null where simplejson raises, so output with a null is left to simplejson too
+    """
+    if HAS_ORJSON:
+        option = _ORJSON_OPTIONS | orjson.OPT_NON_STR_KEYS if non_str_keys else _ORJSON_OPTIONS
+        try:
+            data: bytes = orjson.dumps(obj, default=default, option=option)
+        except TypeError:
+            return None  # integers beyond 64 bits, Decimals, namedtuples or non-str keys, which simplejson writes
+        if b"null" not in data:
+            return data
+    return None
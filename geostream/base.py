@@ -1,7 +1,9 @@
 import abc
 import io
+import mmap
 import struct
 import typing as typ
+from collections import deque
 from functools import partial
 
 from geostream.constants import GEOJSON_EPSG_SRID, GEOSTREAM_SCHEMA_VERSIONS
@@ -10,6 +12,16 @@ from geostream.feature import Feature, FeatureCollection, Properties
 HEADER_STRUCT = "<III"
 INTEGER_STRUCT = "<I"
 
+_HEADER = struct.Struct(HEADER_STRUCT)
+_LENGTH = struct.Struct(INTEGER_STRUCT)
+LENGTH_SIZE = _LENGTH.size
+
+READ_BUFFER_SIZE = 1 << 20
+REVERSE_READ_BUFFER_SIZE = 1 << 17  # each refill seeks and re-slices the buffer, so fewer larger refills are faster
+
+Buffer = typ.Union[bytes, bytearray, memoryview]  # compressed feature data, as read or as a view of a mapped file
+Select = typ.Callable[[typ.Mapping[str, typ.Any]], bool]  # predicate over the properties of each feature
+
 
 class Header(typ.NamedTuple):
     version: int
@@ -19,26 +31,43 @@ class Header(typ.NamedTuple):
 
 def read_header(stream: typ.BinaryIO) -> Header:
     stream.seek(0, io.SEEK_SET)  # header is located at the start of the stream
-    header = Header(*struct.unpack(HEADER_STRUCT, stream.read(struct.calcsize(HEADER_STRUCT))))
+    header = Header(*_HEADER.unpack(stream.read(_HEADER.size)))
     version = header.version
     if version not in GEOSTREAM_SCHEMA_VERSIONS:
-        raise ValueError(
-            f"GeoStream schema version: {version} not supported, expected one of: {GEOSTREAM_SCHEMA_VERSIONS}"
-        )
+        expected = tuple(sorted(GEOSTREAM_SCHEMA_VERSIONS))  # formatted as when the versions were a tuple
+        raise ValueError(f"GeoStream schema version: {version} not supported, expected one of: {expected}")
 
     return header
 
 
+class _RawStreamBuffer(io.BufferedReader):
+    """Read buffer over a caller owned raw stream, the raw stream is left open when the buffer is discarded"""
+
+    def close(self) -> None:
+        pass
+
+
+def _raw_feature(feature: typ.Dict[str, typ.Any]) -> Feature:
+    return typ.cast(Feature, feature)
+
+
 class GeoStreamReader(typ.Iterator[Feature]):
     """Stream header accessors and iterator over a readable binary stream of compressed GeoJSON Features"""
 
-    __slots__ = ("stream", "_schema_version", "_srid", "_props", "_construct_feature")
+    __slots__ = ("stream", "_schema_version", "_srid", "_props", "_construct_feature", "_select")
     GEOSTREAM_SCHEMA_VERSION: int
 
-    def __init__(self, stream: typ.BinaryIO) -> None:
-        self.stream: typ.BinaryIO = stream
+    def __init__(self, stream: typ.BinaryIO, raw: bool = False, select: typ.Optional[Select] = None) -> None:
+        """
+        raw=True iterates over the plain decoded dictionaries, skipping the Feature construction.
+        select skips the features whose properties it returns False for, before their geometry is decoded
+        """
+        self.stream: typ.BinaryIO = self._buffered(stream)
+        self._select = select
         self._schema_version, self._srid, self._props = self._read_stream_header()
-        self._construct_feature = partial(Feature.from_dict, srid=self._srid)
+        self._construct_feature: typ.Callable[[typ.Dict[str, typ.Any]], Feature] = (
+            _raw_feature if raw else partial(Feature.from_dict, srid=self._srid)
+        )
 
     def __iter__(self) -> "GeoStreamReader":
         return self
@@ -50,14 +79,25 @@ class GeoStreamReader(typ.Iterator[Feature]):
         else:
             return get_next
 
+    @staticmethod
+    def _buffered(stream: typ.BinaryIO) -> typ.BinaryIO:
+        """Wrap an unbuffered stream, so the small per-feature reads don't each go to the OS"""
+        if isinstance(stream, io.RawIOBase):
+            return typ.cast(typ.BinaryIO, _RawStreamBuffer(stream, buffer_size=READ_BUFFER_SIZE))
+        return stream
+
     @abc.abstractmethod
     def _load_properties(self, buffer: bytes) -> Properties:
         ...
 
     @abc.abstractmethod
-    def _load_feature(self, data: bytes) -> Feature:
+    def _load_feature(self, data: Buffer) -> typ.Optional[Feature]:
+        """Decode the feature, or return None when it isn't selected"""
         ...
 
+    def _selects(self, feature: typ.Mapping[str, typ.Any]) -> bool:
+        return self._select is None or self._select(feature.get("properties") or {})
+
     def _read_stream_header(self) -> typ.Tuple[int, int, typ.Optional[Properties]]:
         version, srid, props_len = read_header(self.stream)
         if version != self.GEOSTREAM_SCHEMA_VERSION:
@@ -72,21 +112,21 @@ class GeoStreamReader(typ.Iterator[Feature]):
         return version, srid, props
 
     def _read_length(self) -> typ.Optional[int]:
-        read_len = struct.calcsize(INTEGER_STRUCT)
-        buffer: bytes = self.stream.read(read_len)
-        return struct.unpack(INTEGER_STRUCT, buffer)[0] if len(buffer) == read_len else None
+        buffer: bytes = self.stream.read(LENGTH_SIZE)
+        return _LENGTH.unpack(buffer)[0] if len(buffer) == LENGTH_SIZE else None
 
     def _reader(self) -> typ.Optional[Feature]:
-        zip_len = self._read_length()
-        if zip_len is not None:
+        while True:
+            zip_len = self._read_length()
+            if zip_len is None:
+                return None  # normal eof
             zip_data: bytes = self.stream.read(zip_len)
-            _ = self._read_length()
-            if zip_data and len(zip_data) == zip_len:
-                return self._load_feature(zip_data)
-            else:
+            if not zip_data or len(zip_data) != zip_len:
                 return None  # unexpected eof after length
-        else:
-            return None  # normal eof
+            self.stream.seek(LENGTH_SIZE, io.SEEK_CUR)  # the trailing length is only needed going backwards
+            feature = self._load_feature(zip_data)
+            if feature is not None:
+                return feature
 
     @property
     def schema_version(self) -> int:
@@ -112,80 +152,141 @@ class GeoStreamReverseReader(GeoStreamReader):
         "remaining_size",
         "offset_from_stream_end",
         "buffer",
+        "cursor",
+        "frames",
+        "mapped",
     )
-    LENGTH_SIZE: int = struct.calcsize(INTEGER_STRUCT)
+    LENGTH_SIZE: int = LENGTH_SIZE
 
-    def __init__(self, stream: typ.BinaryIO, buf_size: int = io.DEFAULT_BUFFER_SIZE) -> None:
-        super().__init__(stream)
+    def __init__(
+        self,
+        stream: typ.BinaryIO,
+        buf_size: int = REVERSE_READ_BUFFER_SIZE,
+        raw: bool = False,
+        select: typ.Optional[Select] = None,
+        memory_map: bool = False,
+    ) -> None:
+        """
+        memory_map=True maps a file backed stream instead of reading it into buffers. The file must not be truncated
+        while it is read, a mapped page past the end of the file kills the process with SIGBUS
+        """
+        super().__init__(stream, raw, select)
         self.buf_size = buf_size
         self.end_of_header_offset = stream.tell()
         self.end_of_stream_offset = self.stream.seek(0, io.SEEK_END)
         self.data_size = self.end_of_stream_offset - self.end_of_header_offset
         self.remaining_size = self.data_size
         self.offset_from_stream_end = 0
-        self.buffer = io.BytesIO()
-
-    def _grow_buffer(self) -> None:
+        # window of the stream read so far, ending where the previous read started
+        self.buffer: typ.Union[bytearray, memoryview] = bytearray()
+        self.cursor = 0  # end of the unread part of the buffer
+        # (offset, length) in the buffer of each complete feature before the cursor, in reverse stream order
+        self.frames: typ.Deque[typ.Tuple[int, int]] = deque()
+        self.mapped: typ.Optional[mmap.mmap] = self._mmap(stream) if memory_map else None
+        if self.mapped is not None:  # the page cache is the buffer, the whole stream is in the window without any reads
+            self.buffer = memoryview(self.mapped)[self.end_of_header_offset : self.end_of_stream_offset]
+            self.cursor = self.data_size
+            self.remaining_size = 0
+            self.offset_from_stream_end = self.data_size
+
+    @staticmethod
+    def _buffered(stream: typ.BinaryIO) -> typ.BinaryIO:
+        return stream  # reads whole buf_size chunks into its own buffer
+
+    def _mmap(self, stream: typ.BinaryIO) -> typ.Optional[mmap.mmap]:
+        """Memory map a file backed stream, or return None for any other stream"""
+        if self.data_size <= 0:
+            return None
+        try:
+            return mmap.mmap(stream.fileno(), self.end_of_stream_offset, access=mmap.ACCESS_READ)
+        except (AttributeError, OSError, ValueError):  # no file descriptor, or one that can't be mapped
+            return None
+
+    def _unmap(self) -> None:
+        """Unmap the file once it has been read back to the start, rather than when the reader is garbage collected"""
+        if self.mapped is not None:
+            typ.cast(memoryview, self.buffer).release()
+            self.buffer = bytearray()
+            self.mapped.close()
+            self.mapped = None
+
+    def _grow_buffer(self, min_size: int = 0) -> None:
         if self.remaining_size > 0:
-            cur_buffer_offset = self.buffer.tell()
-            self.buffer.seek(0, io.SEEK_SET)
-            leftover: bytes = self.buffer.read(cur_buffer_offset)
-            self.offset_from_stream_end = min(self.data_size, (self.offset_from_stream_end + self.buf_size))
+            read_size = min(self.remaining_size, max(self.buf_size, min_size))
+            self.offset_from_stream_end += read_size
             self.stream.seek(-self.offset_from_stream_end, io.SEEK_END)
-            self.buffer = io.BytesIO(self.stream.read(min(self.remaining_size, self.buf_size)))
-            self.remaining_size -= self.buf_size
-            self.buffer.seek(0, io.SEEK_END)
-            self.buffer.write(leftover)
-
-    def _read_length(self) -> typ.Optional[int]:
-        len_buffer: bytes = self.buffer.read(GeoStreamReverseReader.LENGTH_SIZE)
-        return (
-            struct.unpack(INTEGER_STRUCT, len_buffer)[0]
-            if len(len_buffer) == GeoStreamReverseReader.LENGTH_SIZE
-            else None
-        )
+            buffer = typ.cast(bytearray, self.buffer)  # a mapped file has no remaining size, so never grows
+            del buffer[self.cursor :]  # drop the already consumed tail
+            buffer[:0] = self.stream.read(read_size)
+            self.cursor += read_size
+            self.remaining_size -= read_size
+
+    def _scan_frames(self) -> None:
+        """
+        Index the complete features in the buffer up to buf_size bytes before the cursor, in one pass back from the
+        cursor. A mapped file is all one buffer, so this bounds the frames indexed before the first feature is read
+        """
+        buffer, frames, unpack_from = self.buffer, self.frames, _LENGTH.unpack_from
+        cursor = self.cursor
+        stop = cursor - self.buf_size
+        while cursor >= LENGTH_SIZE and cursor > stop:
+            zip_len = unpack_from(buffer, cursor - LENGTH_SIZE)[0]
+            zip_start = cursor - LENGTH_SIZE - zip_len
+            if zip_start < LENGTH_SIZE:
+                break  # the rest of this feature is still in the stream
+            frames.append((zip_start, zip_len))
+            cursor = zip_start - LENGTH_SIZE
 
     def _reader(self) -> typ.Optional[Feature]:
-        if self.buffer.tell() < GeoStreamReverseReader.LENGTH_SIZE:
-            self._grow_buffer()
-            if self.buffer.tell() < GeoStreamReverseReader.LENGTH_SIZE:
-                return None  # malformed stream - couldn't get enough bytes to read the next feature length
-
-        self.buffer.seek(-GeoStreamReverseReader.LENGTH_SIZE, io.SEEK_CUR)
-        zip_len = self._read_length()
-        if zip_len is None:
-            return None  # should never get here
-
-        next_feature: typ.Optional[Feature] = None
-        envelope_size: int = zip_len + (GeoStreamReverseReader.LENGTH_SIZE * 2)
-
-        while envelope_size > self.buffer.tell():
-            self._grow_buffer()
-            if self.remaining_size <= 0 and envelope_size > self.buffer.tell():
-                return None  # malformed stream - missing feature data or corrupted length
-
-        next_relative_offset: int = GeoStreamReverseReader.LENGTH_SIZE + zip_len
-        self.buffer.seek(-next_relative_offset, io.SEEK_CUR)
-        zip_data: bytes = self.buffer.read(zip_len)
-        if zip_data and len(zip_data) == zip_len:
-            next_feature = self._load_feature(zip_data)
-
-        self.buffer.seek(-next_relative_offset, io.SEEK_CUR)
-        return next_feature
+        while True:
+            if not self.frames:
+                self._scan_frames()
+                while not self.frames:
+                    if self.remaining_size <= 0:
+                        self._unmap()
+                        return None  # start of the stream, or a malformed stream missing feature data
+                    if self.cursor >= LENGTH_SIZE:  # grow by at least the rest of the partly buffered feature
+                        zip_len = _LENGTH.unpack_from(self.buffer, self.cursor - LENGTH_SIZE)[0]
+                        self._grow_buffer(zip_len + 2 * LENGTH_SIZE - self.cursor)
+                    else:
+                        self._grow_buffer()
+                    self._scan_frames()
+
+            zip_start, zip_len = self.frames.popleft()
+            self.cursor = zip_start - LENGTH_SIZE
+            if zip_len == 0:
+                self._unmap()
+                return None
+            feature = self._load_feature(self.buffer[zip_start : zip_start + zip_len])
+            if feature is not None:
+                return feature
 
 
 class GeoStreamWriter:
     """Binary stream writer provides methods to write a header followed by compressed GeoJSON Features"""
 
-    __slots__ = ("stream",)
+    __slots__ = ("stream", "compresslevel")
     GEOSTREAM_SCHEMA_VERSION: int
+    COMPRESS_LEVEL: int  # default compression level of the schema version's compressor
 
     def __init__(
-        self, stream: typ.BinaryIO, props: typ.Optional[typ.Mapping[str, typ.Any]] = None, srid: int = GEOJSON_EPSG_SRID
+        self,
+        stream: typ.BinaryIO,
+        props: typ.Optional[typ.Mapping[str, typ.Any]] = None,
+        srid: int = GEOJSON_EPSG_SRID,
+        compresslevel: typ.Optional[int] = None,
     ) -> None:
         self.stream: typ.BinaryIO = stream
+        self.compresslevel: int = self.COMPRESS_LEVEL if compresslevel is None else compresslevel
         self._write_header(srid, props)
 
+    def __enter__(self) -> "GeoStreamWriter":
+        return self
+
+    def __exit__(self, *exc_info: typ.Any) -> None:
+        """Flush everything written to the stream, which is left open for the caller to close"""
+        self.stream.flush()
+
     @abc.abstractmethod
     def _dump_properties(self, properties: Properties) -> typ.Optional[bytes]:
         ...
@@ -197,21 +298,16 @@ class GeoStreamWriter:
     def _write_header(self, srid: int, props: typ.Optional[typ.Mapping[str, typ.Any]] = None) -> None:
         """Only write the header if at the start of the stream - allowing appending to a stream in progress"""
         if self.stream.tell() == 0:
-            properties: typ.Optional[bytes] = self._dump_properties(props)
-            props_len = len(properties) if properties else 0
-            self.stream.write(struct.pack(HEADER_STRUCT, self.GEOSTREAM_SCHEMA_VERSION, srid, props_len))
-            if properties is not None:
-                self.stream.write(properties)
+            properties: bytes = self._dump_properties(props) or b""
+            self.stream.write(_HEADER.pack(self.GEOSTREAM_SCHEMA_VERSION, srid, len(properties)) + properties)
 
     def write_feature(self, feature: typ.Union[typ.Mapping, Feature]) -> None:
         """Write a geojson feature as a compressed GeoJSON feature"""
         if not isinstance(feature, Feature):
             feature = Feature.from_dict(feature)
         zipped_data: bytes = self._dump_feature(feature)
-        zip_len: int = len(zipped_data)
-        self.stream.write(struct.pack(INTEGER_STRUCT, zip_len))
-        self.stream.write(zipped_data)
-        self.stream.write(struct.pack(INTEGER_STRUCT, zip_len))
+        zip_len: bytes = _LENGTH.pack(len(zipped_data))
+        self.stream.write(b"".join((zip_len, zipped_data, zip_len)))  # one write per feature
 
     def write_feature_collection(self, collection: typ.Union[typ.Mapping, FeatureCollection]) -> None:
         """Write all features from a geojson feature collection as compressed GeoJSON features"""
@@ -1,11 +1,12 @@
 #!/usr/bin/env python3
 
 import argparse
+import os
 import sys
 import typing as typ
-from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import date, datetime
-from functools import partial
+from functools import lru_cache, partial
 from glob import iglob
 from pathlib import Path
 from uuid import UUID
@@ -13,9 +14,11 @@ from uuid import UUID
 import simplejson as json
 
 import geostream
-from geostream.feature import Feature, FeatureCollection
+from geostream import _json
+from geostream.feature import FeatureCollection, srid_to_crs
 
-_feature_count = deque([0], maxlen=1)  # internal counter
+_MISSING = object()
+WRITE_BUFFER_SIZE = 1 << 20  # the output is written a feature at a time, so buffer it into fewer, larger writes
 
 
 def _cbor2types_to_json(obj: typ.Any) -> str:
@@ -26,6 +29,90 @@ def _cbor2types_to_json(obj: typ.Any) -> str:
     raise TypeError(repr(obj) + " is not JSON serializable")
 
 
+def _select_predicate(select: typ.Mapping[str, typ.Any]) -> typ.Callable[[typ.Mapping[str, typ.Any]], bool]:
+    """Return a predicate matching Feature properties that have all of the select key/values"""
+    select_items = tuple(select.items())
+
+    def matches(
+        properties: typ.Mapping[str, typ.Any], _items: typ.Tuple[typ.Tuple[str, typ.Any], ...] = select_items
+    ) -> bool:
+        get = properties.get
+        return all(get(key, _MISSING) == value for key, value in _items)
+
+    return matches
+
+
+def _simplejson_dumps(obj: typ.Any, **kwargs: typ.Any) -> bytes:
+    return json.dumps(obj, allow_nan=False, default=_cbor2types_to_json, **kwargs).encode()
+
+
+def _orjson_dumps(obj: typ.Any) -> bytes:
+    """Datetimes are passed through to _cbor2types_to_json, orjson's own isoformat rounds sub-minute UTC offsets"""
+    data = _json.dumps(obj, default=_cbor2types_to_json, non_str_keys=True)
+    return _simplejson_dumps(obj, separators=(",", ":")) if data is None else data
+
+
+class _JsonFormat(typ.NamedTuple):
+    """How unpack_gjz writes its JSON output, chosen once per run"""
+
+    dumps: typ.Callable[[typ.Any], bytes]
+    item_separator: bytes
+    key_separator: bytes
+    indent: bytes  # one level of indentation, empty for compact output
+    sort_keys: bool
+
+
+_PRETTY_JSON = _JsonFormat(partial(_simplejson_dumps, indent=4, sort_keys=True), b",", b": ", b"    ", True)
+_COMPACT_JSON = _JsonFormat(_simplejson_dumps, b", ", b": ", b"", False)
+_COMPACT_ORJSON = _JsonFormat(_orjson_dumps, b",", b":", b"", False)
+
+
+def _json_format(pretty: bool) -> _JsonFormat:
+    """
+    Pretty output is the same as json.dump(collection, fp, indent=4, sort_keys=True), compact output is encoded with
+    orjson when it is installed
+    """
+    if pretty:
+        return _PRETTY_JSON
+    return _COMPACT_ORJSON if _json.HAS_ORJSON else _COMPACT_JSON
+
+
+@lru_cache()
+def _dumps_crs(srid: int, dumps: typ.Callable[[typ.Any], bytes]) -> bytes:
+    """The crs of every collection with the same srid is the same, so only encode it once"""
+    return dumps(srid_to_crs(srid))
+
+
+def _dump_collection(collection: FeatureCollection, fp: typ.BinaryIO, json_format: _JsonFormat) -> int:
+    """
+    Write the collection as JSON one feature at a time, so only a single Feature is held in memory while unpacking.
+    Returns the number of features written
+    """
+    dumps, item_separator, key_separator, indent, sort_keys = json_format
+    level1, level2 = (b"\n" + indent, b"\n" + indent * 2) if indent else (b"", b"")
+
+    def dumps_indented(obj: typ.Any, level: bytes = level1) -> bytes:
+        return dumps(obj).replace(b"\n", level) if indent else dumps(obj)  # JSON strings never contain a raw newline
+
+    dumps_feature = partial(dumps_indented, level=level2) if indent else dumps
+
+    count = 0
+    fp.write(b"{")
+    for i, key in enumerate(sorted(collection) if sort_keys else collection):
+        fp.write(b"".join((item_separator if i else b"", level1, _simplejson_dumps(key), key_separator)))
+        if key == "features":
+            fp.write(b"[")
+            for count, feature in enumerate(collection.features, 1):
+                fp.write(b"".join((item_separator if count > 1 else b"", level2, dumps_feature(feature))))
+            fp.write((level1 if count else b"") + b"]")
+        elif key == "crs" and collection[key] is srid_to_crs(collection.srid):
+            fp.write(_dumps_crs(collection.srid, dumps).replace(b"\n", level1))
+        else:
+            fp.write(dumps_indented(collection[key]))
+    fp.write(b"\n}" if indent and collection else b"}")
+    return count
+
+
 def cli() -> None:
     args = parse_args()
 
@@ -55,7 +142,11 @@ def cli() -> None:
         except Exception as e:
             sys.stderr.write(f"Invalid select text, must be valid JSON string: {args.select}. Error: {e}\n")
             exit(1)
+        if not isinstance(select, dict):
+            sys.stderr.write(f"Invalid select text, must be a JSON object of properties to match: {args.select}\n")
+            exit(1)
 
+    unpack_files: typ.List[typ.Tuple[Path, typ.Optional[Path]]] = []
     for gjz_file in [f for i in args.inputs for f in iglob(i)]:
         input_gjz = Path(gjz_file)
 
@@ -73,61 +164,90 @@ def cli() -> None:
         else:
             output_file = input_gjz.parent.joinpath(input_gjz.stem + ".json")
 
-        if args.verbose:
-            print(f"Unpacking: {gjz_file} into: {output_file}")
+        unpack_files.append((input_gjz, output_file))
 
-        with input_gjz.open("rb") as bf:
-            try:
-                reader = geostream.reader(bf, reverse=args.reverse)
-            except Exception as e:
-                print(f"...failed to open {gjz_file}, error: {e}")
-                continue
+    json_format = _json_format(args.pretty)
+    workers = min(len(unpack_files), os.cpu_count() or 1)
+    outputs = [output_file.resolve() for _, output_file in unpack_files if output_file is not None]
+    if len(set(outputs)) < len(outputs):
+        workers = 1  # inputs sharing an output file are unpacked in order, so the last one is kept
+    if workers > 1:  # files are independent, unpack them in parallel
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_unpack_file, input_gjz, output_file, args, select, json_format)
+                for input_gjz, output_file in _log_unpacking(unpack_files, args.verbose)
+            ]
+            _print_reports(future.result() for future in futures)
+    else:
+        _print_reports(
+            _unpack_file(input_gjz, output_file, args, select, json_format)
+            for input_gjz, output_file in _log_unpacking(unpack_files, args.verbose)
+        )
 
-            if select:
-                selected: typ.Iterable[Feature] = filter(
-                    lambda feat: all(item in feat.properties.items() for item in select.items()), reader
-                )
-            else:
-                selected = reader
 
-            if args.verbose:
-                _feature_count.append(0)
-                selected = map(_count_features, selected)
+def _log_unpacking(
+    unpack_files: typ.Iterable[typ.Tuple[Path, typ.Optional[Path]]], verbose: bool
+) -> typ.Iterator[typ.Tuple[Path, typ.Optional[Path]]]:
+    """Yield each input and output file, printing it as it is unpacked or submitted to be unpacked"""
+    for input_gjz, output_file in unpack_files:
+        if verbose:
+            print(f"Unpacking: {input_gjz} into: {output_file}")
+        yield input_gjz, output_file
 
-            geojson_collection = FeatureCollection(
-                features=tuple(selected), properties=reader.properties, srid=reader.srid
-            )
 
-            try:
-                assert output_file is not None
-                with output_file.open("w") as tf:
-                    dump_fn = partial(
-                        json.dump,
-                        geojson_collection,
-                        tf,
-                        allow_nan=False,
-                        iterable_as_array=True,
-                        default=_cbor2types_to_json,
-                    )
-                    if args.pretty:
-                        dump_fn(indent=4, sort_keys=True)
-                    else:
-                        dump_fn()
-            except Exception as e:
-                sys.stderr.write(f"...bad out directory path, failed to open: {output_file}, error: {e}")
-                exit(1)
+def _print_reports(reports: typ.Iterable[str]) -> None:
+    for report in reports:
+        if report:
+            print(report)
 
-            if args.verbose:
-                filtered = f"selected by: {select}" if select else "selected all"
-                print(f"...unpacked {_feature_count[0]} Features, {filtered}")
 
+def _unpack_file(
+    input_gjz: Path,
+    output_file: typ.Optional[Path],
+    args: argparse.Namespace,
+    select: typ.Mapping[str, typ.Any],
+    json_format: _JsonFormat,
+) -> str:
+    """Unpack one GeoStream file, decoding, encoding and writing one Feature at a time. Returns the unpack report"""
+    report: typ.List[str] = []
+    with input_gjz.open("rb") as bf:
+        try:
+            # selecting in the reader skips decoding the geometry of the features that aren't selected
+            reader = geostream.reader(bf, reverse=args.reverse, select=_select_predicate(select) if select else None)
+        except Exception as e:
+            report.append(f"...failed to open {input_gjz}, error: {e}")
+            return "\n".join(report)
 
-def _count_features(pass_thru: typ.Any) -> typ.Any:
-    _feature_count.appendleft(_feature_count.popleft() + 1)
-    return pass_thru
+        # stream the reader into the collection, _dump_collection only iterates over its features once
+        streamed = typ.cast(typ.Sequence[geostream.Feature], reader)
+        geojson_collection = FeatureCollection(features=streamed, properties=reader.properties, srid=reader.srid)
 
+        # features are written as they are read, so write a temporary file that only replaces the output once every
+        # feature has been read, rather than leaving invalid JSON behind when a later record is corrupt
+        try:
+            assert output_file is not None
+            temp_file = output_file.with_name(f"{output_file.name}.{os.getpid()}.tmp")
+            tf = temp_file.open("wb", buffering=WRITE_BUFFER_SIZE)
+        except Exception as e:
+            sys.stderr.write(f"...bad out directory path, failed to open: {output_file}, error: {e}")
+            exit(1)
+        try:
+            with tf:
+                count = _dump_collection(geojson_collection, tf, json_format)
+            os.replace(temp_file, output_file)
+        except BaseException:
+            temp_file.unlink()
+            raise
 
-def parse_args():  # type: ignore
+        if args.verbose:
+            filtered = f"selected by: {select}" if select else "selected all"
+            report.append(f"...unpacked {count} Features, {filtered}")
+    return "\n".join(report)
+
+
+@lru_cache()
+def _argument_parser() -> argparse.ArgumentParser:
+    """The parser is the same for every cli() call, so only build it once"""
     parser = argparse.ArgumentParser(description="Unpack one or more GeoStream compressed files to GeoJSON")
     parser.add_argument(
         "inputs", type=str, metavar="GJZ", nargs="+", help="path(s) to the input geostream (.gjz) file or files"
@@ -139,7 +259,11 @@ def parse_args():  # type: ignore
     parser.add_argument(
         "-s", "--select", help="JSON string to select Features with matching properties to write to output"
     )
+    return parser
 
+
+def parse_args():  # type: ignore
+    parser = _argument_parser()
     if len(sys.argv) == 1:
         parser.print_help(sys.stderr)
         sys.exit(1)
@@ -1,2 +1,2 @@
 GEOJSON_EPSG_SRID = 4326  # per IETF RFC 7946 August 2016, geojson nominal coordinate reference is WGS-84
-GEOSTREAM_SCHEMA_VERSIONS = (3, 4)
+GEOSTREAM_SCHEMA_VERSIONS = frozenset((3, 4, 5))
@@ -1,9 +1,9 @@
 import typing as typ
-from collections import ChainMap
 from functools import lru_cache
 
-from geomet import wkb, wkt
+from geomet import wkt
 
+from geostream import wkb
 from geostream.constants import GEOJSON_EPSG_SRID
 
 Geometry = typ.Mapping[str, typ.Any]
@@ -30,17 +30,30 @@ class Feature(dict, typ.MutableMapping[str, typ.Any]):
     Light-weight GeoJSON Feature object.
     """
 
+    __slots__ = ("__srid",)  # no per instance __dict__, readers construct one Feature per stream record
+
     def __init__(
         self, geometry: Geometry, properties: Properties = None, *, srid: typ.Optional[int] = None, **kwargs: typ.Any
     ) -> None:
-        kwargs.pop("type", None)
-        if properties is None:
-            properties = {}
-        if "crs" in kwargs:
-            raise NotImplementedError("Feature does not support setting crs currently")
-        super().__init__(geometry=geometry, properties=properties, type="Feature", **kwargs)
+        if kwargs:
+            kwargs.pop("type", None)
+            if "crs" in kwargs:
+                raise NotImplementedError("Feature does not support setting crs currently")
+        super().__init__(
+            geometry=geometry, properties={} if properties is None else properties, type="Feature", **kwargs
+        )
         self.__srid = srid
 
+    def __getstate__(self) -> typ.Dict[str, typ.Any]:
+        """The instance __dict__ Features had before __slots__, so pickles load with older and newer versions"""
+        return {**getattr(self, "__dict__", {}), "_Feature__srid": self.__srid}  # with any subclass attributes
+
+    def __setstate__(self, state: typ.Mapping[str, typ.Any]) -> None:
+        attributes = dict(state)
+        self.__srid = attributes.pop("_Feature__srid", None)
+        if attributes:
+            self.__dict__.update(attributes)
+
     @property
     def geometry(self) -> Geometry:
         return self["geometry"]
@@ -63,11 +76,11 @@ class Feature(dict, typ.MutableMapping[str, typ.Any]):
 
     @property
     def ewkt(self) -> str:
-        return wkt.dumps(ChainMap(cached_crs(self.__srid), self["geometry"]))
+        return wkt.dumps({**self["geometry"], **cached_crs(self.__srid)})
 
     @property
     def ewkb(self) -> bytes:
-        return wkb.dumps(ChainMap(cached_crs(self.__srid), self["geometry"]))
+        return wkb.dumps({**self["geometry"], **cached_crs(self.__srid)})
 
     @classmethod
     def from_dict(cls: typ.Type[CLS], value: typ.Mapping, *, srid: typ.Optional[int] = None) -> CLS:
@@ -79,6 +92,8 @@ class FeatureCollection(dict, typ.MutableMapping[str, typ.Any]):
     Light-weight GeoJSON Feature object.
     """
 
+    __slots__ = ("__srid",)
+
     def __init__(
         self,
         features: typ.Sequence[Feature],
@@ -91,10 +106,24 @@ class FeatureCollection(dict, typ.MutableMapping[str, typ.Any]):
         if properties is not None:
             kwargs["properties"] = properties
 
-        kwargs.setdefault("crs", srid_to_crs(srid))
+        if "crs" not in kwargs:
+            kwargs["crs"] = srid_to_crs(srid)
         super().__init__(features=features, type="FeatureCollection", **kwargs)
         self.__srid = srid
 
+    def __getstate__(self) -> typ.Dict[str, typ.Any]:
+        """The instance __dict__ FeatureCollections had before __slots__, so pickles load with older and newer versions"""
+        return {
+            **getattr(self, "__dict__", {}),
+            "_FeatureCollection__srid": self.__srid,
+        }  # with any subclass attributes
+
+    def __setstate__(self, state: typ.Mapping[str, typ.Any]) -> None:
+        attributes = dict(state)
+        self.__srid = attributes.pop("_FeatureCollection__srid", GEOJSON_EPSG_SRID)
+        if attributes:
+            self.__dict__.update(attributes)
+
     @property
     def features(self) -> typ.Sequence[Feature]:
         return self["features"]
@@ -1,37 +1,69 @@
-import io
 import typing as typ
 
-from geostream.base import GeoStreamReader, GeoStreamWriter, read_header
+from geostream.base import (
+    REVERSE_READ_BUFFER_SIZE,
+    GeoStreamReader,
+    GeoStreamReverseReader,
+    GeoStreamWriter,
+    Select,
+    read_header,
+)
 from geostream.constants import GEOJSON_EPSG_SRID
 from geostream.v3 import GeoStreamReaderV3, GeoStreamReverseReaderV3
 from geostream.v4 import GeoStreamReaderV4, GeoStreamReverseReaderV4, GeoStreamWriterV4
+from geostream.v5 import GeoStreamReaderV5, GeoStreamReverseReaderV5, GeoStreamWriterV5
 
+_READERS: typ.Mapping[int, typ.Type[GeoStreamReader]] = {
+    3: GeoStreamReaderV3,
+    4: GeoStreamReaderV4,
+    5: GeoStreamReaderV5,
+}
+_REVERSE_READERS: typ.Mapping[int, typ.Type[GeoStreamReverseReader]] = {
+    3: GeoStreamReverseReaderV3,
+    4: GeoStreamReverseReaderV4,
+    5: GeoStreamReverseReaderV5,
+}
+_WRITERS: typ.Mapping[int, typ.Type[GeoStreamWriter]] = {4: GeoStreamWriterV4, 5: GeoStreamWriterV5}
 
-def reader(stream: typ.BinaryIO, reverse: bool = False, rev_buf_size: int = io.DEFAULT_BUFFER_SIZE) -> GeoStreamReader:
+
+def reader(
+    stream: typ.BinaryIO,
+    reverse: bool = False,
+    rev_buf_size: int = REVERSE_READ_BUFFER_SIZE,
+    raw: bool = False,
+    select: typ.Optional[Select] = None,
+    memory_map: bool = False,
+) -> GeoStreamReader:
     """
     Return a geojson Feature iterator that reads and unpacks compressed GeoJSON features from the stream
     until the features are exhausted, and provides properties to access the unpacked header data
     :param stream: Readable Binary IO object
     :param reverse: Flag to reverse the order of iteration from the end of the stream. Default: False
-    :param rev_buf_size: Buffer length for reverse iterator
+    :param rev_buf_size: Buffer length for reverse iterator, smaller values use less memory on small streams.
+    Not used for memory mapped files. Default: 128 KiB
+    :param raw: Flag to iterate over plain GeoJSON Feature dictionaries instead of Feature objects. Default: False
+    :param select: (Optional) Predicate called with the properties of each feature, features it returns False for
+    are skipped without decoding their geometry. Default: None
+    :param memory_map: Flag to memory map a file backed stream for the reverse iterator, instead of reading it into
+    buffers. The file must not be truncated while it is read, that kills the process with SIGBUS. Default: False
     :return: GeoStreamReader object
     """
-    header = read_header(stream)
+    header = read_header(stream)  # raises ValueError for versions not in GEOSTREAM_SCHEMA_VERSIONS
 
-    if header.version == 4:
-        if reverse is False:
-            return GeoStreamReaderV4(stream)
-        else:
-            return GeoStreamReverseReaderV4(stream, buf_size=rev_buf_size)
+    if reverse is False:
+        return _READERS[header.version](stream, raw=raw, select=select)
     else:
-        if reverse is False:
-            return GeoStreamReaderV3(stream)
-        else:
-            return GeoStreamReverseReaderV3(stream, buf_size=rev_buf_size)
+        return _REVERSE_READERS[header.version](
+            stream, buf_size=rev_buf_size, raw=raw, select=select, memory_map=memory_map
+        )
 
 
 def writer(
-    stream: typ.BinaryIO, props: typ.Optional[typ.Mapping[str, typ.Any]] = None, srid: int = GEOJSON_EPSG_SRID
+    stream: typ.BinaryIO,
+    props: typ.Optional[typ.Mapping[str, typ.Any]] = None,
+    srid: int = GEOJSON_EPSG_SRID,
+    schema_version: int = 4,
+    compresslevel: typ.Optional[int] = None,
 ) -> GeoStreamWriter:
     """
     Return a writer that translates a feature/feature collection into compressed GeoJSON Feature(s) that
@@ -40,6 +72,13 @@ def writer(
     :param props: (Optional) Dictionary of properties to add to the header. Default: None
     :param srid: (Optional) EPSG SRID integer for the GeoJSON x, y coordinates geographic reference.
     Default: Defined in the constant: GEOJSON_EPSG_SRID
+    :param schema_version: (Optional) GeoStream schema version to write, 4 (zlib) or 5 (zstd). Default: 4
+    :param compresslevel: (Optional) zlib or zstd compression level, higher levels compress slower.
+    Default: 1 for zlib, 3 for zstd
     :return: GeoStreamWriter object
     """
-    return GeoStreamWriterV4(stream, props, srid=srid)
+    if schema_version not in _WRITERS:
+        raise ValueError(
+            f"GeoStream schema version: {schema_version} not supported, expected one of: {sorted(_WRITERS)}"
+        )
+    return _WRITERS[schema_version](stream, props, srid=srid, compresslevel=compresslevel)
@@ -1,9 +1,40 @@
 import gzip
 import typing as typ
+import zlib
+from enum import Enum
+from uuid import UUID
 
 import simplejson as json
 
-from geostream.base import Feature, GeoStreamReader, GeoStreamReverseReader, GeoStreamWriter, Properties
+from geostream import _json
+from geostream.base import Buffer, Feature, GeoStreamReader, GeoStreamReverseReader, GeoStreamWriter, Properties
+from geostream.constants import GEOJSON_EPSG_SRID
+
+GZIP_WBITS = 16 + zlib.MAX_WBITS  # zlib deflate wrapped in a gzip header and trailer
+GZIP_LEVEL = 9  # gzip.compress default
+
+_ENCODER = json.JSONEncoder()  # the same settings as json.dumps
+_SIMPLEJSON_REJECTS = (UUID, Enum)  # orjson writes these natively, with no option to pass them through
+
+
+def _gunzip(data: Buffer) -> bytes:
+    """Decompress a gzip feature with zlib directly, skipping the gzip module's per call header parsing in Python"""
+    decompressor = zlib.decompressobj(GZIP_WBITS)
+    result = decompressor.decompress(data)
+    if not decompressor.eof:  # gzip.decompress raises the same for a truncated feature or trailer
+        raise EOFError("Compressed file ended before the end-of-stream marker was reached")
+    if decompressor.unused_data:
+        return gzip.decompress(data)  # more than one gzip member
+    return result
+
+
+def _has_rejected(value: typ.Any) -> bool:
+    """Whether the value holds a UUID or Enum, which simplejson raises TypeError for and orjson would write"""
+    if isinstance(value, dict):
+        return any(map(_has_rejected, value.values()))
+    elif isinstance(value, (list, tuple)):
+        return any(map(_has_rejected, value))
+    return isinstance(value, _SIMPLEJSON_REJECTS)
 
 
 class GeoStreamReaderV3(GeoStreamReader):
@@ -12,10 +43,11 @@ class GeoStreamReaderV3(GeoStreamReader):
     GEOSTREAM_SCHEMA_VERSION = 3
 
     def _load_properties(self, buffer: bytes) -> Properties:
-        return json.loads(buffer)
+        return _json.loads(buffer)
 
-    def _load_feature(self, data: bytes) -> Feature:
-        return self._construct_feature(json.loads(gzip.decompress(data).decode()))
+    def _load_feature(self, data: Buffer) -> typ.Optional[Feature]:
+        feature = _json.loads(_gunzip(data))
+        return self._construct_feature(feature) if self._selects(feature) else None
 
 
 class GeoStreamReverseReaderV3(GeoStreamReverseReader):
@@ -24,23 +56,55 @@ class GeoStreamReverseReaderV3(GeoStreamReverseReader):
     GEOSTREAM_SCHEMA_VERSION = 3
 
     def _load_properties(self, buffer: bytes) -> Properties:
-        return json.loads(buffer)
+        return _json.loads(buffer)
 
-    def _load_feature(self, data: bytes) -> Feature:
-        return self._construct_feature(json.loads(gzip.decompress(data).decode()))
+    def _load_feature(self, data: Buffer) -> typ.Optional[Feature]:
+        feature = _json.loads(_gunzip(data))
+        return self._construct_feature(feature) if self._selects(feature) else None
 
 
 class GeoStreamWriterV3(GeoStreamWriter):
     """Binary stream writer provides methods to write a header followed by compressed GeoJSON Features"""
 
+    __slots__ = ("_validate",)
     GEOSTREAM_SCHEMA_VERSION: int = 3
+    COMPRESS_LEVEL: int = GZIP_LEVEL
+
+    def __init__(
+        self,
+        stream: typ.BinaryIO,
+        props: typ.Optional[typ.Mapping[str, typ.Any]] = None,
+        srid: int = GEOJSON_EPSG_SRID,
+        compresslevel: typ.Optional[int] = None,
+        *,
+        validate: bool = True,
+    ) -> None:
+        """validate=False skips checking each geometry converts to WKB, which V3 streams don't otherwise need"""
+        self._validate = validate
+        super().__init__(stream, props, srid, compresslevel)
 
     def _dump_properties(self, properties: Properties) -> typ.Optional[bytes]:
         if properties is not None:
-            return json.dumps(properties).encode()
+            return (None if _has_rejected(properties) else _json.dumps(properties)) or json.dumps(properties).encode()
         else:
             return None
 
+    def _simplejson_rejects(self, feature: Feature) -> bool:
+        """Validated coordinates are numbers, so only the rest of the feature is checked for simplejson to reject"""
+        geometry = feature.get("geometry")
+        if self._validate and isinstance(geometry, dict):
+            rest = [value for key, value in geometry.items() if key != "coordinates"]
+            return _has_rejected(rest) or any(_has_rejected(v) for k, v in feature.items() if k != "geometry")
+        return _has_rejected(feature)
+
     def _dump_feature(self, feature: Feature) -> bytes:
-        feature.wkb  # Validity check
-        return gzip.compress(json.dumps(feature).encode())
+        if self._validate:
+            feature.wkb  # Validity check
+        compressor = zlib.compressobj(self.compresslevel, zlib.DEFLATED, GZIP_WBITS)
+        data = None if self._simplejson_rejects(feature) else _json.dumps(feature)
+        if data is not None:
+            return compressor.compress(data) + compressor.flush()
+        # compress the JSON as it is encoded, rather than holding the whole JSON text as both a str and bytes
+        zipped_data = [compressor.compress(chunk.encode()) for chunk in _ENCODER.iterencode(feature)]
+        zipped_data.append(compressor.flush())
+        return b"".join(zipped_data)
@@ -2,21 +2,26 @@ import typing as typ
 import zlib
 
 import cbor2
-from geomet import wkb
 
-from geostream.base import Feature, GeoStreamReader, GeoStreamReverseReader, GeoStreamWriter, Properties
+from geostream import wkb
+from geostream.base import Buffer, Feature, GeoStreamReader, GeoStreamReverseReader, GeoStreamWriter, Properties
 
 
 class GeoStreamReaderV4(GeoStreamReader):
     """Stream header accessors and iterator over a readable binary stream of compressed GeoJSON Features"""
 
     GEOSTREAM_SCHEMA_VERSION = 4
+    _inflate_size: int = zlib.DEF_BUF_SIZE  # initial output buffer size, the size of the previous feature
 
     def _load_properties(self, buffer: bytes) -> Properties:
         return cbor2.loads(buffer)
 
-    def _load_feature(self, data: bytes) -> Feature:
-        feature = cbor2.loads(zlib.decompress(data))
+    def _load_feature(self, data: Buffer) -> typ.Optional[Feature]:
+        cbor_data = zlib.decompress(data, bufsize=self._inflate_size)
+        self._inflate_size = len(cbor_data)
+        feature = cbor2.loads(cbor_data)
+        if not self._selects(feature):
+            return None
         feature["geometry"] = wkb.loads(feature["geometry"])
         return self._construct_feature(feature)
 
@@ -25,12 +30,17 @@ class GeoStreamReverseReaderV4(GeoStreamReverseReader):
     """Stream header accessors and backwards iterator over a readable binary stream of compressed GeoJSON Features"""
 
     GEOSTREAM_SCHEMA_VERSION = 4
+    _inflate_size: int = zlib.DEF_BUF_SIZE  # initial output buffer size, the size of the previous feature
 
     def _load_properties(self, buffer: bytes) -> Properties:
         return cbor2.loads(buffer)
 
-    def _load_feature(self, data: bytes) -> Feature:
-        feature = cbor2.loads(zlib.decompress(data))
+    def _load_feature(self, data: Buffer) -> typ.Optional[Feature]:
+        cbor_data = zlib.decompress(data, bufsize=self._inflate_size)
+        self._inflate_size = len(cbor_data)
+        feature = cbor2.loads(cbor_data)
+        if not self._selects(feature):
+            return None
         feature["geometry"] = wkb.loads(feature["geometry"])
         return self._construct_feature(feature)
 
@@ -39,6 +49,7 @@ class GeoStreamWriterV4(GeoStreamWriter):
     """Binary stream writer provides methods to write a header followed by compressed GeoJSON Features"""
 
     GEOSTREAM_SCHEMA_VERSION: int = 4
+    COMPRESS_LEVEL: int = 1  # CBOR with WKB geometry compresses about as well at 1 as at the zlib default of 6, faster
 
     def _dump_properties(self, properties: Properties) -> typ.Optional[bytes]:
         if properties is not None:
@@ -49,4 +60,4 @@ class GeoStreamWriterV4(GeoStreamWriter):
     def _dump_feature(self, feature: Feature) -> bytes:
         result = dict(feature)
         result["geometry"] = feature.wkb
-        return zlib.compress(cbor2.dumps(result))
+        return zlib.compress(cbor2.dumps(result), self.compresslevel)
@@ -0,0 +1,94 @@
+import typing as typ
+
+import cbor2
+
+from geostream import wkb
+
+try:
+    import zstandard
+
+    HAS_ZSTANDARD = True
+except ImportError:  # pragma: no cover
+    HAS_ZSTANDARD = False
+
+from geostream.base import REVERSE_READ_BUFFER_SIZE, Buffer, Feature, Select
+from geostream.constants import GEOJSON_EPSG_SRID
+from geostream.v4 import GeoStreamReaderV4, GeoStreamReverseReaderV4, GeoStreamWriterV4
+
+ZSTD_LEVEL = 3
+
+
+def _require_zstandard() -> None:
+    if not HAS_ZSTANDARD:
+        raise ImportError(
+            "GeoStream schema version 5 requires zstandard, install with: pip install geostream[zstandard]"
+        )
+
+
+class GeoStreamReaderV5(GeoStreamReaderV4):
+    """Stream header accessors and iterator over a readable binary stream of zstd compressed GeoJSON Features"""
+
+    __slots__ = ("_decompressor",)
+    GEOSTREAM_SCHEMA_VERSION = 5
+
+    def __init__(self, stream: typ.BinaryIO, raw: bool = False, select: typ.Optional[Select] = None) -> None:
+        _require_zstandard()
+        self._decompressor = zstandard.ZstdDecompressor()
+        super().__init__(stream, raw, select)
+
+    def _load_feature(self, data: Buffer) -> typ.Optional[Feature]:
+        feature = cbor2.loads(self._decompressor.decompress(data))  # the frame header holds the decompressed size
+        if not self._selects(feature):
+            return None
+        feature["geometry"] = wkb.loads(feature["geometry"])
+        return self._construct_feature(feature)
+
+
+class GeoStreamReverseReaderV5(GeoStreamReverseReaderV4):
+    """Stream header accessors and backwards iterator over a readable binary stream of zstd compressed Features"""
+
+    __slots__ = ("_decompressor",)
+    GEOSTREAM_SCHEMA_VERSION = 5
+
+    def __init__(
+        self,
+        stream: typ.BinaryIO,
+        buf_size: int = REVERSE_READ_BUFFER_SIZE,
+        raw: bool = False,
+        select: typ.Optional[Select] = None,
+        memory_map: bool = False,
+    ) -> None:
+        _require_zstandard()
+        self._decompressor = zstandard.ZstdDecompressor()
+        super().__init__(stream, buf_size, raw, select, memory_map)
+
+    def _load_feature(self, data: Buffer) -> typ.Optional[Feature]:
+        feature = cbor2.loads(self._decompressor.decompress(data))  # the frame header holds the decompressed size
+        if not self._selects(feature):
+            return None
+        feature["geometry"] = wkb.loads(feature["geometry"])
+        return self._construct_feature(feature)
+
+
+class GeoStreamWriterV5(GeoStreamWriterV4):
+    """Binary stream writer provides methods to write a header followed by zstd compressed GeoJSON Features"""
+
+    __slots__ = ("_compressor",)
+    GEOSTREAM_SCHEMA_VERSION: int = 5
+    COMPRESS_LEVEL: int = ZSTD_LEVEL
+
+    def __init__(
+        self,
+        stream: typ.BinaryIO,
+        props: typ.Optional[typ.Mapping[str, typ.Any]] = None,
+        srid: int = GEOJSON_EPSG_SRID,
+        compresslevel: typ.Optional[int] = None,
+    ) -> None:
+        _require_zstandard()
+        super().__init__(stream, props, srid, compresslevel)
+        self._compressor = zstandard.ZstdCompressor(level=self.compresslevel)
+
+    def _dump_feature(self, feature: Feature) -> bytes:
+        result = dict(feature)
+        result["geometry"] = feature.wkb
+        return self._compressor.compress(cbor2.dumps(result))
@@ -0,0 +1,148 @@
+import struct
+import typing as typ
+from itertools import chain
+
+from geomet import wkb as geomet_wkb
+
+Geometry = typ.Dict[str, typ.Any]
+
+_BYTE_ORDERS = {0: ">", 1: "<"}
+_COUNT = {endian: struct.Struct(endian + "i") for endian in _BYTE_ORDERS.values()}
+_TYPE = {endian: struct.Struct(endian + "I") for endian in _BYTE_ORDERS.values()}
+_GEOMETRY_TYPES = {1: "Point", 2: "LineString", 3: "Polygon", 4: "MultiPoint", 5: "MultiLineString", 6: "MultiPolygon"}
+_TYPE_CODES = {name: type_code for type_code, name in _GEOMETRY_TYPES.items()}
+_Z = 1000  # ISO WKB geometry type offset for coordinates with a z value
+_DIMS = {2: 0, 3: _Z, 4: 3000}  # geomet writes 3 values as XYZ and 4 as XYZM
+_HEADERS = {
+    (type_code, dims): b"\x00" + _TYPE[">"].pack(type_code + offset)
+    for type_code in _GEOMETRY_TYPES
+    for dims, offset in _DIMS.items()
+}
+_DEPTHS = {1: 0, 2: 1, 3: 2, 4: 1, 5: 2, 6: 3}  # nesting of the first vertex, which sets the dimensions like geomet
+_MULTI = 3  # MultiPoint, MultiLineString and MultiPolygon type codes are their part type code + 3
+
+
+class _Unsupported(ValueError):
+    """WKB or a geometry that is left to geomet to decode or encode"""
+
+
+def loads(data: bytes) -> Geometry:
+    """
+    Decode WKB into a GeoJSON geometry, returning the same as geomet.wkb.loads.
+    2D and Z points, line strings, polygons and their multi geometries are decoded a whole coordinate sequence at a time,
+    instead of a coordinate at a time. Anything else, such as M coordinates, an EWKB srid, geometry collections or
+    malformed WKB, is decoded by geomet.
+    """
+    try:
+        endian, type_code, dims = _read_header(data, 0)
+        coordinates, _ = _read_coordinates(data, 5, endian, type_code, dims)
+    except (_Unsupported, struct.error, IndexError):
+        return geomet_wkb.loads(data)
+    return {"type": _GEOMETRY_TYPES[type_code], "coordinates": coordinates}
+
+
+def _read_header(data: bytes, offset: int) -> typ.Tuple[str, int, int]:
+    endian = _BYTE_ORDERS.get(data[offset])
+    if endian is None:
+        raise _Unsupported()
+    type_code = _TYPE[endian].unpack_from(data, offset + 1)[0]
+    dims = 2
+    if type_code > _Z:
+        type_code -= _Z
+        dims = 3
+    if type_code not in _GEOMETRY_TYPES:
+        raise _Unsupported()
+    return endian, type_code, dims
+
+
+def _read_count(data: bytes, offset: int, endian: str) -> int:
+    count: int = _COUNT[endian].unpack_from(data, offset)[0]
+    if count <= 0:
+        raise _Unsupported()  # geomet decides what to make of empty geometries
+    return count
+
+
+def _read_points(data: bytes, offset: int, endian: str, dims: int) -> typ.Tuple[typ.List[typ.List[float]], int]:
+    count = _read_count(data, offset, endian)
+    offset += 4
+    values = iter(struct.unpack_from(f"{endian}{count * dims}d", data, offset))
+    return list(map(list, zip(*(values,) * dims))), offset + 8 * count * dims
+
+
+def _read_coordinates(data: bytes, offset: int, endian: str, type_code: int, dims: int) -> typ.Tuple[typ.Any, int]:
+    if type_code == 1:
+        return list(struct.unpack_from(endian + "d" * dims, data, offset)), offset + 8 * dims
+    elif type_code == 2:
+        return _read_points(data, offset, endian, dims)
+
+    count = _read_count(data, offset, endian)
+    offset += 4
+    parts = []
+    if type_code == 3:
+        for _ in range(count):
+            ring, offset = _read_points(data, offset, endian, dims)
+            parts.append(ring)
+    else:
+        part_type = type_code - _MULTI
+        for _ in range(count):
+            if _read_header(data, offset) != (endian, part_type, dims):
+                raise _Unsupported()  # mixed byte order or dimensions
+            part, offset = _read_coordinates(data, offset + 5, endian, part_type, dims)
+            parts.append(part)
+    return parts, offset
+
+
+def dumps(geometry: typ.Mapping[str, typ.Any]) -> bytes:
+    """
+    Encode a GeoJSON geometry as big endian WKB, returning the same as geomet.wkb.dumps.
+    Points, line strings, polygons and their multi geometries are packed a whole coordinate sequence at a time.
+    Anything else, such as geometries with an srid in their meta, geometry collections, empty or invalid geometries,
+    is encoded (or rejected) by geomet.
+    """
+    if "meta" not in geometry:
+        try:
+            type_code = _TYPE_CODES[geometry["type"]]
+            coordinates = geometry["coordinates"]
+            first = coordinates
+            for _ in range(_DEPTHS[type_code]):
+                first = first[0]
+            dims = len(first)
+            parts = [_HEADERS[type_code, dims]]
+            _write_coordinates(parts, coordinates, type_code, dims)
+            return b"".join(parts)
+        except (_Unsupported, struct.error, KeyError, IndexError, TypeError):
+            pass
+    return geomet_wkb.dumps(geometry)
+
+
+def _write_count(parts: typ.List[bytes], sequence: typ.Sized) -> None:
+    if not sequence:
+        raise _Unsupported()  # geomet decides what to make of empty geometries
+    parts.append(_COUNT[">"].pack(len(sequence)))
+
+
+def _write_points(parts: typ.List[bytes], points: typ.Sequence[typ.Sequence[float]], dims: int) -> None:
+    _write_count(parts, points)
+    if set(map(len, points)) != {dims}:
+        raise _Unsupported()  # mixed dimensions
+    parts.append(struct.pack(f">{len(points) * dims}d", *chain.from_iterable(points)))
+
+
+def _write_coordinates(parts: typ.List[bytes], coordinates: typ.Any, type_code: int, dims: int) -> None:
+    if type_code == 1:
+        parts.append(struct.pack(f">{dims}d", *coordinates))
+    elif type_code == 2:
+        _write_points(parts, coordinates, dims)
+    elif type_code == 3:
+        _write_count(parts, coordinates)
+        for ring in coordinates:
+            _write_points(parts, ring, dims)
+    else:
+        part_type = type_code - _MULTI
+        part_header = _HEADERS[part_type, dims]
+        _write_count(parts, coordinates)
+        for part in coordinates:
+            parts.append(part_header)
+            if part_type == 1 and len(part) != dims:
+                raise _Unsupported()  # mixed dimensions
+            _write_coordinates(parts, part, part_type, dims)
@@ -1,14 +1,26 @@
+import copy
+import gzip
 import io
+import pickle
 import struct
 import typing as typ
+import uuid
 from datetime import datetime
+from enum import Enum
+from pathlib import Path
+from unittest.mock import patch
 
 import cbor2
 import pytest
+import simplejson as json
+from geomet import wkb as geomet_wkb
 
 import geostream
+from geostream import wkb
+from geostream.base import GeoStreamReverseReader
 from geostream.constants import GEOJSON_EPSG_SRID, GEOSTREAM_SCHEMA_VERSIONS
-from geostream.feature import FeatureCollection
+from geostream.feature import Feature, FeatureCollection
+from geostream.v3 import GeoStreamReaderV3, GeoStreamWriterV3
 
 
 def _feature(shape: str, coord: typ.Any) -> dict:
@@ -70,16 +82,16 @@ def test_write_read_geojson_with_props(gjson: dict, props: typ.Dict[str, str]) -
     writer = geostream.writer(byte_stream, props)
     writer.write_feature(gjson)
     byte_stream.seek(0)
-    header1, header2, prop_len = struct.unpack("Bii", byte_stream.read(struct.calcsize("Bii")))
+    header1, header2, prop_len = struct.unpack("<III", byte_stream.read(struct.calcsize("<III")))
     assert header1 in GEOSTREAM_SCHEMA_VERSIONS
     assert header2 == GEOJSON_EPSG_SRID
     assert prop_len > 0
     p = byte_stream.read(prop_len)
     header_props = cbor2.loads(p)
     assert header_props["unit"] == "something"
-    length = struct.unpack("i", byte_stream.read(struct.calcsize("i")))[0]
+    length = struct.unpack("<I", byte_stream.read(struct.calcsize("<I")))[0]
     zipped_data = byte_stream.read(length)
-    trailing_length = struct.unpack("i", byte_stream.read(struct.calcsize("i")))[0]
+    trailing_length = struct.unpack("<I", byte_stream.read(struct.calcsize("<I")))[0]
     assert len(zipped_data) == length
     assert length == trailing_length
     byte_stream.seek(0)
@@ -106,13 +118,13 @@ def test_write_geojson_feature_collection_no_props(feat_collection_1: dict) -> N
     writer = geostream.writer(output_stream)
     writer.write_feature_collection(collection)
     output_stream.seek(0)
-    header1, header2, props_len = struct.unpack("Bii", output_stream.read(struct.calcsize("Bii")))
+    header1, header2, props_len = struct.unpack("<III", output_stream.read(struct.calcsize("<III")))
     assert header1 in GEOSTREAM_SCHEMA_VERSIONS
     assert header2 == GEOJSON_EPSG_SRID
     assert props_len == 0
-    length = struct.unpack("i", output_stream.read(struct.calcsize("i")))[0]
+    length = struct.unpack("<I", output_stream.read(struct.calcsize("<I")))[0]
     zipped_data = output_stream.read(length)
-    trailing_length = struct.unpack("i", output_stream.read(struct.calcsize("i")))[0]
+    trailing_length = struct.unpack("<I", output_stream.read(struct.calcsize("<I")))[0]
     assert len(zipped_data) == length
     assert length == trailing_length
 
@@ -123,13 +135,13 @@ def test_write_geojson_feature_collection_diff_srid(feat_collection_1: dict) ->
     writer = geostream.writer(output_stream, srid=1234)
     writer.write_feature_collection(collection)
     output_stream.seek(0)
-    header1, header2, props_len = struct.unpack("Bii", output_stream.read(struct.calcsize("Bii")))
+    header1, header2, props_len = struct.unpack("<III", output_stream.read(struct.calcsize("<III")))
     assert header1 in GEOSTREAM_SCHEMA_VERSIONS
     assert header2 == 1234
     assert props_len == 0
-    length = struct.unpack("i", output_stream.read(struct.calcsize("i")))[0]
+    length = struct.unpack("<I", output_stream.read(struct.calcsize("<I")))[0]
     zipped_data = output_stream.read(length)
-    trailing_length = struct.unpack("i", output_stream.read(struct.calcsize("i")))[0]
+    trailing_length = struct.unpack("<I", output_stream.read(struct.calcsize("<I")))[0]
     assert len(zipped_data) == length
     assert length == trailing_length
 
@@ -180,7 +192,7 @@ def test_read_truncated_after_feature_length(feat_collection_2: dict) -> None:
     byte_stream = io.BytesIO()
     writer = geostream.writer(byte_stream, collection_props)
     writer.write_feature_collection(collection)
-    byte_stream.write(struct.pack("i", 2))  # append the length of a second feature, but don't append data
+    byte_stream.write(struct.pack("<I", 2))  # append the length of a second feature, but don't append data
     byte_stream.seek(0)
     reader = geostream.reader(byte_stream)
     read_features = [f for f in reader]
@@ -215,7 +227,7 @@ def test_reverse_read_empty_stream_raises_exception() -> None:
 
 
 def test_read_invalid_schema_from_stream_raises_exception(feat_collection_2: dict) -> None:
-    with pytest.raises(ValueError):
+    with pytest.raises(ValueError, match=r"version: 0 not supported, expected one of: \(3, 4, 5\)$"):
         collection = feat_collection_2
         collection_props = {"unit": "something", "key": "uuid"}
         byte_stream = io.BytesIO()
@@ -245,3 +257,316 @@ def test_feature_collection_class(feat_collection_2: dict) -> None:
     assert fc.properties is None
     assert fc.srid == GEOJSON_EPSG_SRID
     assert len(fc.features) == 1
+
+
+def test_read_unbuffered_file_stream(gjz_file_larger_v3: typ.Tuple[str, str]) -> None:
+    file_name = gjz_file_larger_v3[0]
+    with open(file_name, "rb") as bf:
+        expected_features = [f for f in geostream.reader(bf)]
+    with open(file_name, "rb", buffering=0) as raw:
+        reader = geostream.reader(raw)
+        read_features = [f for f in reader]
+        del reader
+        assert not raw.closed
+    assert len(read_features) == len(expected_features)
+    assert read_features == expected_features
+
+
+@pytest.mark.parametrize("buf_size", [1, 16, 1024, 1 << 20])
+def test_reverse_read_buffer_sizes(feat_collection_3: dict, buf_size: int) -> None:
+    byte_stream = io.BytesIO()
+    writer = geostream.writer(byte_stream)
+    for i in range(0, 10):
+        writer.write_feature_collection(feat_collection_3)
+    byte_stream.seek(0)
+    forward_features = [f for f in geostream.reader(byte_stream)]
+    byte_stream.seek(0)
+    reverse_features = [f for f in geostream.reader(byte_stream, reverse=True, rev_buf_size=buf_size)]
+    assert len(reverse_features) == 30
+    assert reverse_features == forward_features[::-1]
+
+
+def test_feature_encodings_follow_geometry(feat_collection_1: dict) -> None:
+    feature = Feature.from_dict(feat_collection_1["features"][0])
+    first_wkb = feature.wkb
+    assert feature.wkb == first_wkb
+    assert feature.ewkb != first_wkb
+    feature["geometry"] = dict(type="Point", coordinates=[-115.81, 37.24])
+    assert feature.wkb != first_wkb
+    assert geostream.Feature(**feature).wkb == feature.wkb
+
+
+def test_write_feature_geometry_modified_in_place() -> None:
+    feature = Feature(geometry=dict(type="Point", coordinates=[0.0, 0.0]), properties={})
+    first_wkb, first_wkt = feature.wkb, feature.wkt
+    feature["geometry"]["coordinates"][0] = 5.0
+    assert feature.wkb != first_wkb
+    assert feature.wkt != first_wkt
+    byte_stream = io.BytesIO()
+    geostream.writer(byte_stream).write_feature(feature)
+    byte_stream.seek(0)
+    assert next(geostream.reader(byte_stream)).geometry == dict(type="Point", coordinates=[5.0, 0.0])
+
+
+@pytest.mark.parametrize("protocol", range(pickle.HIGHEST_PROTOCOL + 1))
+def test_pickle_feature_and_collection(protocol: int) -> None:
+    feature = Feature(geometry=dict(type="Point", coordinates=[1, 2]), properties={"a": 1}, srid=3857)
+    collection = FeatureCollection(features=[feature], srid=3857)
+    for value in (feature, collection):
+        loaded = pickle.loads(pickle.dumps(value, protocol=protocol))
+        assert type(loaded) is type(value)
+        assert loaded == value
+        assert loaded.srid == 3857
+    assert pickle.loads(pickle.dumps(collection, protocol=protocol)).features[0].srid == 3857
+
+
+class _TaggedFeature(Feature):
+    tag: str
+
+
+def test_pickle_and_copy_keep_subclass_attributes() -> None:
+    feature = _TaggedFeature(geometry=dict(type="Point", coordinates=[1, 2]), srid=3857)
+    feature.tag = "x"
+    for loaded in (pickle.loads(pickle.dumps(feature)), copy.deepcopy(feature), copy.copy(feature)):
+        assert type(loaded) is _TaggedFeature
+        assert loaded == feature
+        assert loaded.srid == 3857
+        assert loaded.tag == "x"
+    with pytest.raises(AttributeError):
+        Feature(geometry=feature.geometry).tag = "x"  # type: ignore[attr-defined]
+
+
+def test_unpickle_feature_with_instance_dict_state() -> None:
+    # pickled by releases before Feature had __slots__, its srid was in the instance __dict__
+    pickled = (
+        b"ccopy_reg\n_reconstructor\np0\n(cgeostream.feature\nFeature\np1\nc__builtin__\ndict\np2\n(dp3\n"
+        b"Vgeometry\np4\n(dp5\nVtype\np6\nVPoint\np7\nsVcoordinates\np8\n(lp9\nI1\naI2\nassVproperties\n"
+        b"p10\n(dp11\nVa\np12\nI1\nssg6\nVFeature\np13\nstp14\nRp15\n(dp16\nV_Feature__srid\np17\nI3857\nsb."
+    )
+    feature = pickle.loads(pickled)
+    assert type(feature) is Feature
+    assert feature == Feature(geometry=dict(type="Point", coordinates=[1, 2]), properties={"a": 1})
+    assert feature.srid == 3857
+
+
+def test_feature_collection_keeps_members(feat_collection_2: dict) -> None:
+    props = {"unit": "something"}
+    crs = {"type": "name", "properties": {"name": "EPSG:3857"}}
+    fc = FeatureCollection(features=feat_collection_2["features"], properties=props, srid=3857, crs=crs)
+    assert fc.properties is props
+    assert fc["crs"] is crs
+    assert FeatureCollection(features=[], srid=3857)["crs"] == crs
+
+
+def test_v3_round_trip_multi_member_gzip(feat_collection_1: dict) -> None:
+    feature = feat_collection_1["features"][0]
+    byte_stream = io.BytesIO()
+    GeoStreamWriterV3(byte_stream).write_feature(feature)
+    data = json.dumps(feature).encode()
+    split = len(data) // 2
+    zipped = gzip.compress(data[:split]) + gzip.compress(data[split:])
+    byte_stream.write(struct.pack("<I", len(zipped)) + zipped + struct.pack("<I", len(zipped)))
+    byte_stream.seek(0)
+    assert [f for f in GeoStreamReaderV3(byte_stream)] == [feature, feature]
+
+
+@pytest.mark.parametrize("truncate", [1, 4, 8, 20])
+def test_v3_read_truncated_gzip_raises_exception(feat_collection_1: dict, truncate: int) -> None:
+    zipped = gzip.compress(json.dumps(feat_collection_1["features"][0]).encode())[:-truncate]
+    byte_stream = io.BytesIO()
+    GeoStreamWriterV3(byte_stream)
+    byte_stream.write(struct.pack("<I", len(zipped)) + zipped + struct.pack("<I", len(zipped)))
+    for reverse in (False, True):
+        byte_stream.seek(0)
+        with pytest.raises(EOFError):
+            next(geostream.reader(byte_stream, reverse=reverse))
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_v3_read_integers_beyond_64_bits(feat_collection_1: dict, use_orjson: bool) -> None:
+    feature = feat_collection_1["features"][0]
+    feature["properties"] = {"big": 1 << 70, "name": "café"}
+    byte_stream = io.BytesIO()
+    GeoStreamWriterV3(byte_stream, {"count": 1}).write_feature(feature)
+    byte_stream.seek(0)
+    with patch.object(geostream._json, "HAS_ORJSON", use_orjson):
+        reader = GeoStreamReaderV3(byte_stream)
+        assert reader.properties == {"count": 1}
+        assert next(reader).properties == {"big": 1 << 70, "name": "café"}
+
+
+class _Color(Enum):
+    RED = 1
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_v3_write_properties(feat_collection_1: dict, use_orjson: bool) -> None:
+    feature = feat_collection_1["features"][0]
+    properties = {"big": 1 << 70, "none": None, "name": "café", 1: (1, 2)}
+    feature["properties"] = properties
+    byte_stream = io.BytesIO()
+    with patch.object(geostream._json, "HAS_ORJSON", use_orjson):
+        writer = GeoStreamWriterV3(byte_stream, {"count": 1})
+        writer.write_feature(feature)
+        with pytest.raises(ValueError):
+            writer.write_feature(geostream.Feature(geometry=feature["geometry"], properties={"nan": float("nan")}))
+        for value in (uuid.uuid4(), _Color.RED):  # orjson writes these, simplejson always rejected them
+            for validate in (True, False):
+                with pytest.raises(TypeError):
+                    GeoStreamWriterV3(io.BytesIO(), validate=validate).write_feature(
+                        geostream.Feature(geometry=feature["geometry"], properties={"values": [value]})
+                    )
+            with pytest.raises(TypeError):
+                GeoStreamWriterV3(io.BytesIO(), {"value": value})
+    byte_stream.seek(0)
+    assert [f.properties for f in GeoStreamReaderV3(byte_stream)] == [
+        {"big": 1 << 70, "none": None, "name": "café", "1": [1, 2]}
+    ]
+
+
+def test_v3_writer_validate(feat_collection_1: dict) -> None:
+    feature = feat_collection_1["features"][0]
+    feature["geometry"] = dict(type="Curve", coordinates=[])
+    with pytest.raises(ValueError):
+        GeoStreamWriterV3(io.BytesIO()).write_feature(feature)
+    byte_stream = io.BytesIO()
+    GeoStreamWriterV3(byte_stream, validate=False).write_feature(feature)
+    byte_stream.seek(0)
+    assert [f for f in GeoStreamReaderV3(byte_stream)] == [feature]
+
+
+@pytest.mark.parametrize("schema_version", [4, 5])
+def test_write_read_schema_versions(feat_collection_3: dict, schema_version: int) -> None:
+    if schema_version == 5:
+        pytest.importorskip("zstandard")
+    byte_stream = io.BytesIO()
+    writer = geostream.writer(byte_stream, {"unit": "something"}, schema_version=schema_version)
+    writer.write_feature_collection(feat_collection_3)
+    byte_stream.seek(0)
+    reader = geostream.reader(byte_stream)
+    assert reader.schema_version == schema_version
+    assert reader.properties == {"unit": "something"}
+    read_features = [f for f in reader]
+    assert read_features == feat_collection_3["features"]
+    byte_stream.seek(0)
+    assert [f for f in geostream.reader(byte_stream, reverse=True)] == read_features[::-1]
+    for value, expected in (("val0", read_features), ("val1", [])):
+        byte_stream.seek(0)
+        assert [f for f in geostream.reader(byte_stream, select=lambda p: p.get("prop0") == value)] == expected
+
+
+@pytest.mark.parametrize("schema_version", [4, 5])
+def test_write_read_compresslevel(feat_collection_3: dict, schema_version: int) -> None:
+    if schema_version == 5:
+        pytest.importorskip("zstandard")
+    sizes = []
+    for compresslevel in (None, 9):
+        byte_stream = io.BytesIO()
+        writer = geostream.writer(byte_stream, schema_version=schema_version, compresslevel=compresslevel)
+        writer.write_feature_collection(feat_collection_3)
+        byte_stream.seek(0)
+        assert [f for f in geostream.reader(byte_stream)] == feat_collection_3["features"]
+        sizes.append(len(byte_stream.getvalue()))
+    assert sizes[1] <= sizes[0]
+
+
+def test_write_unsupported_schema_version_raises_exception() -> None:
+    with pytest.raises(ValueError):
+        geostream.writer(io.BytesIO(), schema_version=3)
+
+
+def test_reverse_read_mapped_file(gjz_file_larger_v3: typ.Tuple[str, str], tmp_path: Path) -> None:
+    with open(gjz_file_larger_v3[0], "rb") as bf:
+        forward_features = [f for f in geostream.reader(bf)]
+        bf.seek(0)
+        assert not isinstance(typ.cast(GeoStreamReverseReader, geostream.reader(bf, reverse=True)).buffer, memoryview)
+        reverse_reader = typ.cast(GeoStreamReverseReader, geostream.reader(bf, reverse=True, memory_map=True))
+        assert isinstance(reverse_reader.buffer, memoryview)
+        assert [f for f in reverse_reader] == forward_features[::-1]
+        assert reverse_reader.mapped is None  # unmapped once read back to the start
+        bf.seek(0)
+        reverse_reader = typ.cast(
+            GeoStreamReverseReader, geostream.reader(bf, reverse=True, rev_buf_size=1024, memory_map=True)
+        )
+        assert next(reverse_reader) == forward_features[-1]
+        assert 0 < len(reverse_reader.frames) < len(forward_features) - 1  # only the frames of the first window
+        assert sum(zip_len + 2 * 4 for _, zip_len in reverse_reader.frames) <= 1024
+        assert [f for f in reverse_reader] == forward_features[-2::-1]
+    empty_file = tmp_path / "empty.gjz"
+    with empty_file.open("wb") as bf:
+        geostream.writer(bf)
+    with empty_file.open("rb") as bf:
+        assert [f for f in geostream.reader(bf, reverse=True, memory_map=True)] == []
+
+
+@pytest.mark.parametrize(
+    "geometry",
+    [
+        dict(type="Point", coordinates=[-115.81, 37.24]),
+        dict(type="Point", coordinates=[-115.81, 37.24, 1.5]),
+        dict(type="LineString", coordinates=[[1.0, 2.0], [3.0, 4.0], [5.0, 6.0]]),
+        dict(type="Polygon", coordinates=[[[10, 10], [40, 10], [40, 40], [10, 10]], [[20, 20], [30, 20], [20, 20]]]),
+        dict(type="MultiPoint", coordinates=[[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]]),
+        dict(type="MultiLineString", coordinates=[[[1.0, 2.0], [3.0, 4.0]], [[5.0, 6.0], [7.0, 8.0]]]),
+        dict(type="MultiPolygon", coordinates=[[[[3.78, 9.28], [-130.91, 1.52], [35.12, 72.234], [3.78, 9.28]]]]),
+        dict(type="Point", coordinates=[1.0, 2.0, 3.0, 4.0]),
+        dict(type="Point", coordinates=[1.0, 2.0], meta={"srid": 3857}),
+        dict(type="GeometryCollection", geometries=[dict(type="Point", coordinates=[1.0, 2.0])]),
+    ],
+)
+@pytest.mark.parametrize("big_endian", [True, False])
+def test_wkb_same_as_geomet(geometry: dict, big_endian: bool) -> None:
+    assert wkb.dumps(geometry) == geomet_wkb.dumps(geometry)
+    data = geomet_wkb.dumps(geometry, big_endian=big_endian)
+    loaded = wkb.loads(data)
+    assert loaded == geomet_wkb.loads(data)
+    assert list(loaded) == list(geomet_wkb.loads(data))
+    with pytest.raises(Exception):
+        wkb.loads(data[:-1])
+
+
+@pytest.mark.parametrize(
+    "geometry",
+    [
+        dict(type="Point", coordinates=[]),
+        dict(type="LineString", coordinates=[[1.0, 2.0], [3.0, 4.0, 5.0]]),
+        dict(type="Polygon", coordinates=[]),
+        dict(type="MultiPoint", coordinates=[["a", "b"]]),
+    ],
+)
+def test_wkb_dumps_invalid_geometry_raises_exception(geometry: dict) -> None:
+    with pytest.raises(Exception) as geomet_error:
+        geomet_wkb.dumps(geometry)
+    with pytest.raises(geomet_error.type):
+        wkb.dumps(geometry)
+
+
+def test_writer_context_manager_flushes_stream(feat_collection_1: dict, tmp_path: Path) -> None:
+    file_name = tmp_path / "context.gjz"
+    with file_name.open("wb") as bf:
+        with geostream.writer(bf) as writer:
+            writer.write_feature_collection(feat_collection_1)
+        assert not bf.closed
+        with file_name.open("rb") as rf:
+            assert [f for f in geostream.reader(rf)] == feat_collection_1["features"]
+
+
+@pytest.mark.parametrize("reverse", [False, True])
+def test_read_raw_features(feat_collection_3: dict, reverse: bool) -> None:
+    byte_stream = io.BytesIO()
+    geostream.writer(byte_stream).write_feature_collection(feat_collection_3)
+    byte_stream.seek(0)
+    raw_features = [f for f in geostream.reader(byte_stream, reverse=reverse, raw=True)]
+    assert all(type(f) is dict for f in raw_features)
+    byte_stream.seek(0)
+    assert raw_features == [f for f in geostream.reader(byte_stream, reverse=reverse)]
+
+
+@pytest.mark.parametrize("reverse", [False, True])
+def test_read_selected_features(gjz_file_larger_v3: typ.Tuple[str, str], reverse: bool) -> None:
+    with open(gjz_file_larger_v3[0], "rb") as bf:
+        expected = [f for f in geostream.reader(bf, reverse=reverse) if f.properties.get("prop0") == "val1"]
+        bf.seek(0)
+        selected = [f for f in geostream.reader(bf, reverse=reverse, select=lambda p: p.get("prop0") == "val1")]
+    assert len(selected) > 0
+    assert selected == expected
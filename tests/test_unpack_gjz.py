@@ -1,10 +1,17 @@
 import os
+import struct
 import sys
 import typing as typ
+import zlib
+from datetime import datetime, timedelta, timezone
+from glob import glob
+from pathlib import Path
 from unittest.mock import patch
 
 import pytest
+import simplejson as json
 
+import geostream
 from geostream.cli.unpack_gjz import cli
 
 
@@ -38,6 +45,82 @@ def test_unpack_select_bigger_file(gjz_file_larger_v3: typ.Tuple[str, str], test
         assert os.path.isfile(expected_output)
 
 
+@pytest.mark.parametrize("use_orjson", [True, False])
+@pytest.mark.parametrize("flags", [[], ["-p"], ["-r", "-p"]])
+def test_unpack_streams_all_features(
+    gjz_file_larger_v3: typ.Tuple[str, str], test_output_dir: str, flags: typ.List[str], use_orjson: bool
+) -> None:
+    file_name = gjz_file_larger_v3[0]
+    expected_output = test_output_dir + "streamed_" + "".join(flags).replace("-", "") + ".json"
+    testargs = ["cli", *flags, "-o", expected_output, file_name]
+    with patch.object(sys, "argv", testargs), patch.object(geostream._json, "HAS_ORJSON", use_orjson):
+        cli()
+    with open(file_name, "rb") as bf:
+        reader = geostream.reader(bf, reverse="-r" in flags)
+        expected_features = [f for f in reader]
+        expected_properties = reader.properties
+    with open(expected_output) as tf:
+        collection = json.load(tf)
+    assert collection["type"] == "FeatureCollection"
+    assert collection["properties"] == expected_properties
+    assert collection["features"] == expected_features
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_unpack_properties_same_with_orjson(tmp_path: Path, use_orjson: bool) -> None:
+    file_name = tmp_path / "props.gjz"
+    geometry = dict(type="Point", coordinates=[1.0, 2.0])
+    timestamp = datetime(2020, 1, 2, 3, 4, 5, tzinfo=timezone(timedelta(hours=5, seconds=30)))
+    with file_name.open("wb") as bf:
+        writer = geostream.writer(bf)
+        writer.write_feature(geostream.Feature(geometry=geometry, properties={"timestamp": timestamp, "none": None}))
+    expected_output = tmp_path / "props.json"
+    with patch.object(sys, "argv", ["cli", "-o", str(expected_output), str(file_name)]), patch.object(
+        geostream._json, "HAS_ORJSON", use_orjson
+    ):
+        cli()
+    with expected_output.open() as tf:
+        properties = json.load(tf)["features"][0]["properties"]
+    assert properties == {"timestamp": "2020-01-02T03:04:05+05:00:30", "none": None}
+
+    with file_name.open("wb") as bf:
+        geostream.writer(bf).write_feature(geostream.Feature(geometry=geometry, properties={"nan": float("nan")}))
+    with pytest.raises(ValueError):
+        with patch.object(sys, "argv", ["cli", "-o", str(expected_output), str(file_name)]), patch.object(
+            geostream._json, "HAS_ORJSON", use_orjson
+        ):
+            cli()
+
+
+def test_unpack_corrupt_record_leaves_no_output(gjz_file_current_schema: typ.Tuple[str, str], tmp_path: Path) -> None:
+    data = Path(gjz_file_current_schema[0]).read_bytes()
+    header_size = 12 + struct.unpack_from("<III", data)[2]
+    first_len = struct.unpack_from("<I", data, header_size)[0]
+    second_start = header_size + first_len + 2 * 4 + 4  # the second record's data, after its length
+    file_name = tmp_path / "corrupt.gjz"
+    file_name.write_bytes(data[:second_start] + b"\xff" * 8 + data[second_start + 8 :])
+    expected_output = tmp_path / "corrupt.json"
+    with pytest.raises(zlib.error):
+        with patch.object(sys, "argv", ["cli", "-o", str(expected_output), str(file_name)]):
+            cli()
+    assert os.listdir(tmp_path) == ["corrupt.gjz"]
+
+
+def test_unpack_select_matches_all_items(gjz_file_larger_v3: typ.Tuple[str, str], test_output_dir: str) -> None:
+    file_name = gjz_file_larger_v3[0]
+    expected_output = test_output_dir + "big_selected_items.json"
+    select = {"prop0": "val1"}
+    testargs = ["cli", "-s", json.dumps(select), "-o", expected_output, file_name]
+    with patch.object(sys, "argv", testargs):
+        cli()
+    with open(file_name, "rb") as bf:
+        expected_features = [f for f in geostream.reader(bf) if f.properties.get("prop0") == "val1"]
+    with open(expected_output) as tf:
+        collection = json.load(tf)
+    assert len(collection["features"]) > 0
+    assert collection["features"] == expected_features
+
+
 def test_reverse_unpack_bigger_file(gjz_file_larger_v3: typ.Tuple[str, str], test_output_dir: str) -> None:
     file_name = gjz_file_larger_v3[0]
     expected_output = test_output_dir + "rev_big_vector.json"
@@ -84,6 +167,43 @@ def test_unpack_multiple(gjz_files_all_in_dir: typ.Tuple[str, str], test_output_
         assert os.path.isdir(output_dir)
 
 
+def test_unpack_multiple_in_parallel(
+    gjz_files_all_in_dir: typ.Tuple[str, str], test_output_dir: str, capsys: pytest.CaptureFixture
+) -> None:
+    files_glob = gjz_files_all_in_dir[0]
+    output_dir = test_output_dir + "all_parallel_out"
+    testargs = ["cli", "-v", "-o", output_dir, files_glob]
+    with patch.object(sys, "argv", testargs), patch.object(os, "cpu_count", return_value=2):
+        cli()
+    assert sorted(os.listdir(output_dir)) == sorted(
+        os.path.basename(f).replace(".gjz", ".json")
+        for f in glob(files_glob)
+        if not f.endswith(("_v2.gjz", "wrongversion.gjz"))
+    )
+    lines = capsys.readouterr().out.splitlines()
+    unpacking = [line for line in lines if line.startswith("Unpacking: ")]
+    assert len(unpacking) == len(os.listdir(output_dir)) + 2  # the two unreadable files are logged too
+    assert lines[: len(unpacking)] == unpacking  # logged as they are submitted, before any report
+
+
+def test_unpack_same_output_keeps_last_input(
+    gjz_file_current_schema: typ.Tuple[str, str], gjz_file_v3_schema: typ.Tuple[str, str], tmp_path: Path
+) -> None:
+    inputs = []
+    for name, (file_name, _) in (("a", gjz_file_current_schema), ("b", gjz_file_v3_schema)):
+        (tmp_path / name).mkdir()
+        inputs.append(tmp_path / name / "same.gjz")
+        inputs[-1].write_bytes(Path(file_name).read_bytes())
+    output_dir = tmp_path / "out"
+    testargs = ["cli", "-o", str(output_dir), *map(str, inputs)]
+    with patch.object(sys, "argv", testargs), patch.object(os, "cpu_count", return_value=2):
+        cli()
+    with open(gjz_file_v3_schema[0], "rb") as bf:
+        expected_features = [f for f in geostream.reader(bf)]
+    with (output_dir / "same.json").open() as tf:
+        assert json.load(tf)["features"] == expected_features
+
+
 def test_unpack_help() -> None:
     testargs = ["cli"]
 
@@ -172,3 +292,17 @@ def test_unpack_bad_select_param(gjz_file_current_schema: typ.Tuple[str, str], t
     with pytest.raises(SystemExit):
         with patch.object(sys, "argv", testargs):
             cli()
+
+
+@pytest.mark.parametrize("select", ['["prop0", "val1"]', '"val1"'])
+def test_unpack_select_not_object(
+    gjz_file_current_schema: typ.Tuple[str, str], test_output_dir: str, select: str
+) -> None:
+    file_name = gjz_file_current_schema[0]
+    expected_output = test_output_dir + "select_not_object.json"
+    testargs = ["cli", "-o", expected_output, "-s", select, file_name]
+
+    with pytest.raises(SystemExit):
+        with patch.object(sys, "argv", testargs):
+            cli()
+    assert not os.path.isfile(expected_output)